@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 
 import logging
+import sys
 
 from reload.api import Reload, cli
 from reload.utils import config_logger
@@ -8,7 +9,8 @@ from reload.utils import config_logger
 logger = logging.getLogger(__name__)
 
 
-if __name__ == "__main__":
+def main() -> None:
+    """Entry point for ``python -m reload`` and the zipapp archive."""
     # Setup CLI and parse args
     parser = cli()
     args = parser.parse_args()
@@ -17,6 +19,25 @@ if __name__ == "__main__":
     log_level = logging.DEBUG if args.verbose else logging.INFO
     config_logger(filename=args.log_file, level=log_level)
 
+    # Update the archive instead of running reloads. The build tooling is only
+    # imported here to keep it out of the start time of regular runs.
+    if args.self_update:
+        from reload.bundle import self_update
+        try:
+            self_update(args.self_update)
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.error(f"Self-update failed: {e}")
+            sys.exit(1)
+        return
+
     # Run reloads.
-    reload = Reload(config_file=args.config_file)#, prompt_user=args.prompt)
-    reload.run(args.force_reload)
+    reload = Reload(
+        config_file=args.config_file,
+        endpoints=args.webdriver,
+        confirm_timeout=args.confirm_timeout
+    )#, prompt_user=args.prompt)
+    reload.run(args.force_reload, args.reconcile)
+
+
+if __name__ == "__main__":
+    main()
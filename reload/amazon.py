@@ -1,16 +1,20 @@
 """Reload Amazon gift card balance."""
 
 import logging
+import re
+import threading
 
 from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple, Union
 
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
-from webdriver_manager.chrome import ChromeDriverManager
+from reload.drivers import LocalDriverFactory, RemoteDriverPool
+from reload.pacing import Outcome, Pacer
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,9 @@ _URL: str = "https://www.amazon.com/asv/reload/"
 _ID: dict = dict(
     auth_code = "auth-mfa-otpcode",
     buynow = "buyNow_feature_div",
+    captcha = "captchacharacters",
+    captcha_signin = "auth-captcha-guess",
+    confirm = "widget-purchaseConfirmationStatus",
     cont = "continue",
     pwd = "ap_password",
     reload = "gcui-asv-reload-form-custom-amount",
@@ -30,26 +37,60 @@ _ID: dict = dict(
 )
 """Amazon HTML IDs."""
 
+_TITLES: dict = dict(
+    captcha = ("Robot Check",),
+    challenge = ("Amazon Sign-In", "Authentication required"),
+    throttle = ("Sorry! Something went wrong", "Service Unavailable", "503"),
+)
+"""Amazon page titles (or partial titles) used to classify page outcomes."""
+
+_ACTIVITY_URL: str = "https://www.amazon.com/gc/balance"
+"""Amazon URL for the gift card balance and activity."""
+
+_CONFIRM_URL: str = "/thankyou"
+"""Partial URL of the Amazon order confirmation page."""
+
+_ORDER_ID: re.Pattern = re.compile(r"\b[A-Z0-9]{3}-\d{7}-\d{7}\b")
+"""Amazon order ID pattern, e.g. ``111-1234567-1234567`` or ``D01-1234567-1234567``."""
+
+_PROMPT_LOCK: threading.Lock = threading.Lock()
+"""Lock so accounts signing in at the same time prompt the user one at a time."""
+
 
 # TODO: when there are multiple purchases, provide option to leave browser open
 class Amazon:
     """"""
 
 
-    def __init__(self, username: str, password: str, card: str) -> None:
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        card: str,
+        pacer: Optional[Pacer] = None,
+        drivers: Optional[Union[LocalDriverFactory, RemoteDriverPool]] = None
+    ) -> None:
         self.username = username
         self.password = password
         self.card = card
+        self.pacer = pacer if pacer else Pacer()
+        self.signed_in = False
 
         # Create driver and navigate to sign-in page
-        logger.debug("Creating Chrome driver")
-        self._DRIVER = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()),
-            options=webdriver.ChromeOptions()
-        )
+        self._drivers = drivers if drivers else LocalDriverFactory()
+        self._DRIVER = self._drivers.create()
+
+        # Sign in, releasing the driver if it fails so remote sessions aren't leaked
+        try:
+            self._sign_in()
+        except Exception:
+            self.close()
+            raise
 
-        # Sign in
-        self._sign_in()
+
+    def close(self) -> None:
+        """Release the driver back to the driver factory."""
+        self._drivers.release(self._DRIVER)
 
     #def _wait(self, title: Optional[str] = None, timeout: float = 10) -> None:
     #    if title:
@@ -62,50 +103,190 @@ class Amazon:
     #            time.sleep(0.25)
 
 
+    def _has_element(self, id: str) -> bool:
+        return len(self._DRIVER.find_elements(By.ID, id)) > 0
+
+
+    def outcome(self) -> Outcome:
+        """Classify the current page from its title and known elements."""
+        title = self._DRIVER.title
+        logger.debug(f"Classifying page with title '{title}'")
+
+        if (
+            any(t in title for t in _TITLES["captcha"])
+            or self._has_element(_ID["captcha"])
+            or self._has_element(_ID["captcha_signin"])
+        ):
+            return Outcome.CAPTCHA
+        if any(t in title for t in _TITLES["throttle"]):
+            return Outcome.THROTTLE
+        if (
+            any(t in title for t in _TITLES["challenge"])
+            or self._has_element(_ID["auth_code"])
+        ):
+            return Outcome.CHALLENGE
+        return Outcome.SUCCESS
+
+
+    def _navigate(self, url: str) -> Outcome:
+        # Classify the page before looking for any elements on it so a CAPTCHA or
+        # throttle page is backed off from instead of raising NoSuchElementException.
+        # Successes are recorded once the whole interaction completes.
+        logger.debug(f"Navigating to Amazon '{url}'")
+        self._DRIVER.get(url)
+        outcome = self.outcome()
+        if outcome is not Outcome.SUCCESS:
+            self.pacer.record(outcome)
+            logger.error(f"Amazon responded to '{url}' with {outcome.value}.")
+        return outcome
+
+
     def _sign_in(self) -> None:#, timeout: float) -> None:
         # Navigate to Amazon go to sign in page
         amzn_home = "https://www.amazon.com/"
-        logger.debug(f"Navigating to Amazon '{amzn_home}'")
-        self._DRIVER.get(amzn_home)
+        if self._navigate(amzn_home) is not Outcome.SUCCESS:
+            return
         self._DRIVER.find_element(By.ID, _ID["signin"]).click()
 
         #TODO: might need to wait for page title "Amazon Sign-In" using _wait()
-        #TODO: might need to add some waits so amazon doesn't flag or reject log in
-        # Sign in with username and password
+        # Sign in with username and password, pacing each step so Amazon doesn't flag
+        # or reject the log in.
         logger.info("Entering credentials.")
-        #self._wait_for_sign_in(10)
+        self.pacer.wait()
         self._DRIVER.find_element(By.ID, _ID["usr"]).send_keys(self.username)
         self._DRIVER.find_element(By.ID, _ID["cont"]).click()
 
-        #self._wait_for_sign_in(10)
+        self.pacer.wait()
         self._DRIVER.find_element(By.ID, _ID["pwd"]).send_keys(self.password)
         self._DRIVER.find_element(By.ID, _ID["submit"]).click()
 
         # Check for OTP/Multi factor auth and prompt user for info
-        title = self._DRIVER.title
-        logger.debug(f"Page title after entering password is '{title}'")
-        if title == "Amazon Sign-In":
-            logger.info("OTP/multifactor authentication requested")
-            otp = input("Please enter the OTP code sent to you: ")
+        if self._has_element(_ID["auth_code"]):
+            logger.info(f"OTP/multifactor authentication requested for {self.username}")
+            with _PROMPT_LOCK:
+                otp = input(
+                    f"Please enter the OTP code sent to you for {self.username}: "
+                )
             self._DRIVER.find_element(By.ID, _ID["auth_code"]).send_keys(otp)
             self._DRIVER.find_element(By.ID, _ID["signin_auth"]).click()
         else:
             logger.debug("No OTP/two-factor authentication requested.")
 
+        outcome = self.outcome()
+        self.pacer.record(outcome)
+        self.signed_in = outcome is Outcome.SUCCESS
+        if self.signed_in:
+            logger.debug("Signed in successfully.")
+        else:
+            logger.error(f"Failed to sign in, Amazon responded with {outcome.value}.")
+
+
+    def _confirm(self, timeout: float) -> Tuple[bool, Optional[str]]:
+        logger.debug(f"Waiting up to {timeout} seconds for order confirmation")
+        try:
+            WebDriverWait(self._DRIVER, timeout, poll_frequency=0.25).until(
+                EC.any_of(
+                    EC.url_contains(_CONFIRM_URL),
+                    EC.presence_of_element_located((By.ID, _ID["confirm"])),
+                )
+            )
+        except TimeoutException:
+            logger.debug(
+                f"Order confirmation not found, page title is '{self._DRIVER.title}'"
+            )
+            return False, None
+
+        order_id = find_order_id(self._DRIVER.page_source)
+        if order_id:
+            logger.info(f"Order confirmed with order ID {order_id}.")
+        else:
+            logger.warning("Order confirmed but the order ID could not be found.")
+        return True, order_id
+
 
     # TODO: add ability to prompt user to confirm before clicking buy now
-    def reload_balance(self, amount: float) -> bool:
+    def reload_balance(
+        self,
+        amount: float,
+        confirm_timeout: float = 10
+    ) -> Tuple[bool, Optional[str]]:
+        """Reload gift card balance and wait for the order confirmation.
+
+        Args:
+            amount:
+                Amount to reload.
+            confirm_timeout:
+                Seconds to wait for the order confirmation page after submitting.
+
+        Returns:
+            Tuple of whether the order was confirmed and the order ID if it was found.
+        """
         #if amount < 0.5:
         #    raise ValueError("'amount' must be >= 0.5")
 
         # Go to reloads page
         amzn_reload = "https://www.amazon.com/asv/reload/"
-        logger.debug(f"Navigating to Amazon '{amzn_reload}'")
-        self._DRIVER.get(amzn_reload)
+        if self._navigate(amzn_reload) is not Outcome.SUCCESS:
+            return False, None
 
         # Add balance and submit
         logger.info(f"Reloading gift card balance with ${amount}.")
         self._DRIVER.find_element(By.ID, _ID["reload"]).send_keys(amount)
         self._DRIVER.find_element(By.ID, _ID["buynow"]).click()
 
-        return True
+        # A missing confirmation without any other signal is still a failed purchase,
+        # so it is backed off from instead of being treated as a success.
+        confirmed, order_id = self._confirm(confirm_timeout)
+        if confirmed:
+            outcome = Outcome.SUCCESS
+        else:
+            outcome = self.outcome()
+            if outcome is Outcome.SUCCESS:
+                outcome = Outcome.UNCONFIRMED
+        self.pacer.record(outcome)
+        return confirmed, order_id
+
+
+    def reload_activity(self) -> Optional[List[str]]:
+        """Get the lines of the gift card balance and activity page.
+
+        This is used before re-running an unconfirmed purchase so a reload that went
+        through without its confirmation page being seen isn't purchased twice.
+        Reference :func:`~reload.amazon.find_reloads`.
+
+        Returns:
+            Lines of the activity or ``None`` if the activity could not be checked.
+        """
+        if self._navigate(_ACTIVITY_URL) is not Outcome.SUCCESS:
+            return None
+        return self._DRIVER.find_element(By.TAG_NAME, "body").text.splitlines()
+
+
+def find_order_id(text: str) -> Optional[str]:
+    """Find the first Amazon order ID in ``text``."""
+    match = _ORDER_ID.search(text)
+    return match.group(0) if match else None
+
+
+def find_reloads(lines: Sequence[str], amount: float, date: datetime) -> List[str]:
+    """Find the gift card activity lines for reloads of ``amount`` around ``date``.
+
+    A match is any line that contains the amount and either the date of the purchase or
+    the following day.
+
+    Args:
+        lines:
+            Lines of the gift card activity from :meth:`Amazon.reload_activity`.
+        amount:
+            Amount of the reload.
+        date:
+            Date the reload was submitted.
+    """
+    amount_str = f"${amount:.2f}"
+    days = (date, date + timedelta(days=1))
+    dates = (
+        [f"{d:%B} {d.day}, {d.year}" for d in days]
+        + [f"{d:%b} {d.day}, {d.year}" for d in days]
+        + [f"{d:%m/%d/%Y}" for d in days]
+    )
+    return [l for l in lines if amount_str in l and any(d in l for d in dates)]
@@ -2,18 +2,20 @@
 
 import argparse
 import logging
-import random
-import time
+import threading
 
 import reload
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
 from datetime import datetime, timedelta
 from pathlib import Path, PurePath
-from typing import Optional, Union, List, Tuple
+from typing import Callable, Dict, Optional, Union, List, Sequence, Tuple
 
-from reload.amazon import Amazon
-from reload.configparser import parse_config, ReloadConfig
+from reload.amazon import Amazon, find_order_id, find_reloads
+from reload.configparser import parse_config, parse_webdriver_config, ReloadConfig
+from reload.drivers import LocalDriverFactory, RemoteDriverPool
+from reload.pacing import Outcome, Pacer
 from reload.utils import flatten, save_state, load_state
 
 logger = logging.getLogger(__name__)
@@ -30,11 +32,16 @@ DEFAULT_LOG_FILE: PurePath = Path.cwd() / "reloads.log"
 The default log file should be in the current working directory of the caller.
 """
 
+DEFAULT_CONFIRM_TIMEOUT: float = 10
+"""Default seconds to wait for the order confirmation after submitting a reload."""
+
 _STATE_FILE: PurePath = Path.cwd() / ".cache/state.db"
 """Cache directory for saving/loading state."""
 
+_PACER_PREFIX: str = "pacer:"
+"""Prefix of the database key the pacer for each Amazon login is saved under."""
+
 
-# TODO: provide option to update zipapp so script updates when user runs it
 # TODO: provide option to port/translate config file to latest version
 def cli() -> object:
     """Create the command line interface."""
@@ -75,6 +82,57 @@ def cli() -> object:
             " IMPORTANT, this will force purchases to be run for each card."
         )
     )
+    parser.add_argument(
+        "-r",
+        "--reconcile",
+        dest="reconcile",
+        action="store_true",
+        default=False,
+        help=(
+            "Re-run only the purchases from the current month that were not confirmed"
+            " instead of running new purchases. This is useful when a reload failed"
+            " silently and is preferred over ``--force-reload`` which runs purchases"
+            " for each card."
+        )
+    )
+    parser.add_argument(
+        "-t",
+        "--confirm-timeout",
+        dest="confirm_timeout",
+        type=float,
+        default=DEFAULT_CONFIRM_TIMEOUT,
+        help=(
+            "Seconds to wait for the order confirmation after submitting a reload."
+            f" Defaults to {DEFAULT_CONFIRM_TIMEOUT}. Increase this if confirmations are"
+            " slow, otherwise purchases that went through are marked unconfirmed."
+        )
+    )
+    parser.add_argument(
+        "-w",
+        "--webdriver",
+        dest="webdriver",
+        action="append",
+        default=None,
+        metavar="URL",
+        help=(
+            "Remote WebDriver endpoint to run browser sessions on, like"
+            " ``http://node1:4444``. Can be given multiple times to spread accounts"
+            " across a pool of endpoints. Overrides the endpoints in the config file."
+            " Defaults to a local Chrome driver."
+        )
+    )
+    parser.add_argument(
+        "--self-update",
+        dest="self_update",
+        type=str,
+        default=None,
+        metavar="SOURCE",
+        help=(
+            "Replace the zipapp archive being run with the archive at SOURCE, which can"
+            " be a path or URL, then exit without running reloads. Only works when"
+            " running the zipapp archive."
+        )
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -111,12 +169,16 @@ class PurchaseInfo:
     """Number of purchases complete for the month."""
 
     purchased: bool
-    """Purchase was executed.
+    """Purchase was confirmed.
 
-    If there was an error with the purchase, this will be false to state that the
-    purchase did not go through.
+    If there was an error with the purchase or the order confirmation was not found,
+    this will be false to state that the purchase did not go through. These purchases
+    are re-run with :meth:`~reload.api.Reload.run_reconcile`.
     """
 
+    order_id: Optional[str] = None
+    """Amazon order ID from the order confirmation."""
+
     #errors: List[str]
     #"""Errors encountered during purchase."""
 
@@ -134,12 +196,29 @@ class ReloadState:
 
     purchases: Optional[List[PurchaseInfo]] = None
 
+    pacer: Optional[Pacer] = None
+    """Learned pacing between interactions with Amazon for this account.
+
+    This is shared by every config with the same username and is saved separately from
+    the state. Reference :meth:`~reload.api.Reload.get_pacer`.
+    """
+
+
+_Job = Tuple[Callable[[ReloadState], ReloadState], ReloadState]
+"""Reload function and the state to run it with."""
+
 
 class Reload:
     """Reload gift card balance based on configuration file."""
 
 
-    def __init__(self, config_file: Union[str, PurePath], state_file: Optional[Union[str, PurePath]] = None) -> None:
+    def __init__(
+        self,
+        config_file: Union[str, PurePath],
+        state_file: Optional[Union[str, PurePath]] = None,
+        endpoints: Optional[Sequence[str]] = None,
+        confirm_timeout: float = DEFAULT_CONFIRM_TIMEOUT
+    ) -> None:
         config_file = Path(config_file)
         if not config_file.exists():
             raise FileNotFoundError(
@@ -150,6 +229,22 @@ class Reload:
 
         self._configs: List[ReloadConfig] = parse_config(config_file)
         self._db_file = state_file if state_file else _STATE_FILE
+        self._confirm_timeout = confirm_timeout
+        self._pacers: Dict[str, Pacer] = {}
+        self._db_lock = threading.Lock()
+
+        # Use remote WebDriver endpoints from the CLI or config file if there are any,
+        # otherwise use a local Chrome driver.
+        wd_config = parse_webdriver_config(config_file)
+        if endpoints:
+            max_sessions = wd_config.max_sessions if wd_config else 1
+            self._drivers = RemoteDriverPool(endpoints, max_sessions=max_sessions)
+        elif wd_config:
+            self._drivers = RemoteDriverPool(
+                wd_config.endpoints, max_sessions=wd_config.max_sessions
+            )
+        else:
+            self._drivers = LocalDriverFactory()
 
 
     def get_state(self, config: ReloadConfig) -> ReloadState:
@@ -179,7 +274,7 @@ class Reload:
                     f"Config does not match database state for '{config.name}'. The"
                     " card changed so the whole cache will be reset."
                 )
-                state = ReloadState(config=config)
+                state = ReloadState(config=config, pacer=state.pacer)
 
         # If the next purchase date isn't set, set it to now so it will get run
         if state.next_purchase_date is None:
@@ -187,9 +282,74 @@ class Reload:
 
         # Configure the purchase information if it isn't set
 
+        # Share the learned pacing with every config for the same Amazon login
+        state.pacer = self.get_pacer(config.username, default=state.pacer)
+
         return state
 
 
+    def get_pacer(self, username: str, default: Optional[Pacer] = None) -> Pacer:
+        """Get the pacer for an Amazon login.
+
+        The same pacer is returned for every config with ``username`` so backoff learned
+        while using one card is applied to the next sign in with that login.
+
+        Args:
+            username:
+                Amazon login.
+            default:
+                Pacer to use if one has not been saved for ``username``, such as one
+                saved with the state before pacers were saved per login.
+        """
+        if username not in self._pacers:
+            pacer = load_state(f"{_PACER_PREFIX}{username}", self._db_file)
+            if pacer is None:
+                pacer = default if default else Pacer()
+            self._pacers[username] = pacer
+        return self._pacers[username]
+
+
+    def save(self, state: ReloadState) -> None:
+        """Save the state and the pacer for its Amazon login to the database/cache."""
+        save_state(state, state.config.name, self._db_file)
+        save_state(
+            state.pacer, f"{_PACER_PREFIX}{state.config.username}", self._db_file
+        )
+
+
+    def _reload(
+        self,
+        amzn: Amazon,
+        state: ReloadState,
+        amount: float
+    ) -> Tuple[bool, Optional[str]]:
+        # Wait between each purchase based on how Amazon is responding
+        state.pacer.wait()
+        ok, order_id = amzn.reload_balance(amount, self._confirm_timeout)
+
+        if ok:
+            state.num_complete += 1
+        else:
+            logger.error(
+                "Error while reloading balance, order was not confirmed"
+                f" ({state.pacer.last_outcome.value})"
+            )
+
+        return ok, order_id
+
+
+    def _challenged(self, state: ReloadState) -> bool:
+        # Further purchases will be rejected until the CAPTCHA or challenge is
+        # resolved, so leave the remainder for the next run.
+        if state.pacer.last_outcome in (Outcome.CAPTCHA, Outcome.CHALLENGE):
+            logger.error(
+                f"Stopping reloads for '{state.config.name}' until the"
+                f" {state.pacer.last_outcome.value} is resolved."
+            )
+            return True
+        return False
+
+
     def run_purchases(self, state: ReloadState) -> ReloadState:
         now = datetime.now()
         cfg = state.config
@@ -197,33 +357,40 @@ class Reload:
         amzn = Amazon(
             username=cfg.username,
             password=cfg.password,
-            card=cfg.card
+            card=cfg.card,
+            pacer=state.pacer,
+            drivers=self._drivers
         )
 
-        # run reloads and wait a random amount of time between each purchase
-        num_reloads = cfg.rand_burst(state.num_complete) if cfg.burst else 1
-        for _ in range(num_reloads):
-            amount = cfg.rand_amount()
-            ok = amzn.reload_balance(amount)
-
-            if ok:
-                state.num_complete += 1
-            else:
-                logger.error("Error while reloading balance")
-
-            # Keep track of purchase information.
-            purch_info = PurchaseInfo(
-                date=datetime.now(),
-                amount=amount,
-                num_complete_for_month=state.num_complete,
-                purchased=ok
-            )
-            if state.purchases is None:
-                state.purchases = [purch_info]
-            else:
-                state.purchases.append(purch_info)
+        try:
+            # run reloads
+            num_reloads = cfg.rand_burst(state.num_complete) if cfg.burst else 1
+            if not amzn.signed_in:
+                logger.error(
+                    f"Skipping reloads for '{cfg.name}' because sign in failed."
+                )
+                num_reloads = 0
+            for _ in range(num_reloads):
+                amount = cfg.rand_amount()
+                ok, order_id = self._reload(amzn, state, amount)
+
+                # Keep track of purchase information.
+                purch_info = PurchaseInfo(
+                    date=datetime.now(),
+                    amount=amount,
+                    num_complete_for_month=state.num_complete,
+                    purchased=ok,
+                    order_id=order_id
+                )
+                if state.purchases is None:
+                    state.purchases = [purch_info]
+                else:
+                    state.purchases.append(purch_info)
 
-            time.sleep(random.uniform(1, 5))
+                if self._challenged(state):
+                    break
+        finally:
+            amzn.close()
 
         # Set state date/time for when the next purchase (or burst purchase) should be
         # executed.
@@ -270,12 +437,130 @@ class Reload:
 
         return state
 
-    def run(self, force: bool = False):
+    def _match_reload(
+        self,
+        purch_info: PurchaseInfo,
+        purchases: List[PurchaseInfo],
+        lines: List[str]
+    ) -> Tuple[bool, Optional[str]]:
+        # Find a reload in the activity for an unconfirmed purchase that isn't already
+        # accounted for by a confirmed purchase. Activity lines with an order ID are
+        # matched by ID, the remaining lines are counted against the confirmed
+        # purchases of the same amount whose order ID isn't in the activity.
+        matches = find_reloads(lines, purch_info.amount, purch_info.date)
+        known = {p.order_id for p in purchases if p.purchased and p.order_id}
+        for line in matches:
+            order_id = find_order_id(line)
+            if order_id and order_id not in known:
+                return True, order_id
+
+        matched_ids = {find_order_id(l) for l in matches} - {None}
+        unmatched = [l for l in matches if find_order_id(l) is None]
+        day = purch_info.date.date()
+        accounted = [
+            p for p in purchases
+            if p.purchased
+            and round(p.amount, 2) == round(purch_info.amount, 2)
+            and p.date.date() in (day, day + timedelta(days=1))
+            and p.order_id not in matched_ids
+        ]
+        return len(unmatched) > len(accounted), None
+
+
+    def run_reconcile(self, state: ReloadState) -> ReloadState:
+        """Re-run purchases from the current month that were not confirmed.
+
+        Each unconfirmed purchase is first looked up in the gift card activity. If a
+        matching reload is found that isn't already accounted for by another purchase,
+        it is marked as purchased, otherwise it is re-run with the same amount. Purchases are updated in place, so confirmed purchases are
+        never repeated, and purchases stop once the number of purchases for the month is
+        complete.
+        """
+        now = datetime.now()
+        cfg = state.config
+        unconfirmed = [
+            p for p in (state.purchases or [])
+            if not p.purchased and (p.date.year, p.date.month) == (now.year, now.month)
+        ]
+        if not unconfirmed:
+            logger.info(f"No unconfirmed purchases to reconcile for '{cfg.name}'.")
+            return state
+
+        logger.info(
+            f"Reconciling {len(unconfirmed)} unconfirmed purchase(s) for '{cfg.name}'."
+        )
+        amzn = Amazon(
+            username=cfg.username,
+            password=cfg.password,
+            card=cfg.card,
+            pacer=state.pacer,
+            drivers=self._drivers
+        )
+        try:
+            if not amzn.signed_in:
+                logger.error(
+                    f"Skipping reconcile for '{cfg.name}' because sign in failed."
+                )
+                return state
+
+            for purch_info in unconfirmed:
+                if state.num_complete >= cfg.purchases:
+                    logger.info(
+                        f"All purchases complete for '{cfg.name}', skipping remaining"
+                        " unconfirmed purchases."
+                    )
+                    break
+
+                # The order may have gone through without the confirmation being seen,
+                # only re-run it if the activity shows it did not.
+                lines = amzn.reload_activity()
+                if lines is None:
+                    logger.error(
+                        f"Unable to check gift card activity for '{cfg.name}', skipping"
+                        " unconfirmed purchase so it is not purchased twice."
+                    )
+                    if self._challenged(state):
+                        break
+                    continue
+                found, order_id = self._match_reload(purch_info, state.purchases, lines)
+                if found:
+                    logger.info(
+                        f"Found unconfirmed reload of ${purch_info.amount:.2f} for"
+                        f" '{cfg.name}' in gift card activity, marking as purchased."
+                    )
+                    state.num_complete += 1
+                    purch_info.num_complete_for_month = state.num_complete
+                    purch_info.purchased = True
+                    purch_info.order_id = order_id
+                    continue
+
+                ok, order_id = self._reload(amzn, state, purch_info.amount)
+                if ok:
+                    purch_info.date = datetime.now()
+                    purch_info.num_complete_for_month = state.num_complete
+                    purch_info.purchased = True
+                    purch_info.order_id = order_id
+
+                if self._challenged(state):
+                    break
+        finally:
+            amzn.close()
+
+        return state
+
+
+    def run(self, force: bool = False, reconcile: bool = False):
+        jobs: List[_Job] = []
         for config in self._configs:
             # Get the state of the config from the database/cache
             state = self.get_state(config)
             min_day, max_day = state.config.days
 
+            # Only re-run unconfirmed purchases when reconciling
+            if reconcile:
+                jobs.append((self.run_reconcile, state))
+                continue
+
             # Run purchase logic only if we have purchases left in the month or if we're
             # within month boundaries for purchasing.
             now = datetime.now()
@@ -286,10 +571,7 @@ class Reload:
                     and state.num_complete < state.config.purchases
                 )
             ):
-                state = self.run_purchases(state)
-
-                # Update the state in the database/cache
-                save_state(state, state.config.name, self._db_file)
+                jobs.append((self.run_purchases, state))
             else:
                 logger.debug(
                     f"Skipping reload for '{state.config.name}' because today is outside"
@@ -297,3 +579,39 @@ class Reload:
                     f" purchase date ({state.next_purchase_date}), or we have completed"
                     f" all purchases ({state.num_complete}/{state.config.purchases})."
                 )
+
+        if not jobs:
+            return
+
+        # Group the jobs by Amazon login so each login signs in once at a time and is
+        # paced like the login of a single user.
+        groups: Dict[str, List[_Job]] = {}
+        for fn, state in jobs:
+            groups.setdefault(state.config.username, []).append((fn, state))
+
+        # Spread the logins across the available browser sessions. With a local driver
+        # there is a single session so logins are run one at a time.
+        workers = max(1, min(len(groups), self._drivers.capacity))
+        logger.debug(
+            f"Running {len(jobs)} reload(s) for {len(groups)} login(s) across {workers}"
+            " session(s)"
+        )
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self._run_jobs, group) for group in groups.values()]
+            for future in as_completed(futures):
+                future.result()
+
+
+    def _run_jobs(self, jobs: List[_Job]) -> None:
+        # Run the jobs for a single login one after another
+        for fn, state in jobs:
+            try:
+                state = fn(state)
+            except Exception:
+                # Save the state anyway so purchases that went through before the
+                # error are not repeated.
+                logger.exception(f"Reload for '{state.config.name}' failed")
+
+            # Update the state in the database/cache
+            with self._db_lock:
+                self.save(state)
@@ -0,0 +1,354 @@
+"""Zipapp build, self-update and startup benchmark.
+
+These functions are for shipping reload as a single self-contained zipapp archive. The
+archive includes precompiled bytecode for every module so nothing is compiled when it is
+run, and it runs in isolated mode so only the archive and the standard library are on
+the import path.
+
+.. code-block:: bash
+
+    python -m reload.bundle build -o reload.pyz
+    python -m reload.bundle bench reload.pyz
+    ./reload.pyz --self-update /path/or/url/to/new/reload.pyz
+"""
+
+import argparse
+import compileall
+import logging
+import os
+import py_compile
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+import zipapp
+import zipfile
+
+from pathlib import Path, PurePath
+from typing import Dict, List, Optional, Union
+
+import reload
+
+
+logger = logging.getLogger(__name__)
+
+_PACKAGE_DIR: Path = Path(reload.__file__).parent
+"""Source directory of the reload package."""
+
+DEFAULT_REQUIREMENTS: PurePath = _PACKAGE_DIR.parent / "requirements.txt"
+"""Requirements to bundle into the archive."""
+
+DEFAULT_ARCHIVE: PurePath = Path.cwd() / "reload.pyz"
+"""Default archive to build.
+
+The default archive should be in the current working directory of the caller.
+"""
+
+_BOOTSTRAP: str = """\
+# Modules are not on the file system, mark the interpreter as frozen so dependencies
+# that search for files relative to the calling module (python-dotenv imported by
+# webdriver-manager) use the current working directory instead.
+import sys
+sys.frozen = True
+
+from reload.__main__ import main
+main()
+"""
+"""Entry point of the archive."""
+
+_REQUIRED_MEMBERS: tuple = ("__main__.py", "reload/__init__.py", "reload/__main__.py")
+"""Members an archive must contain to be used for an update."""
+
+
+def build(
+    output: Union[str, PurePath] = DEFAULT_ARCHIVE,
+    requirements: Optional[Union[str, PurePath]] = DEFAULT_REQUIREMENTS,
+    python: str = sys.executable,
+    compressed: bool = False,
+) -> Path:
+    """Build a self-contained zipapp archive.
+
+    .. note::
+        The bytecode is only valid for the Python version used to build the archive, so
+        ``python`` must be the same version as the interpreter running this function.
+
+    Args:
+        output:
+            Archive to create. It is replaced atomically if it already exists.
+        requirements:
+            Requirements file of dependencies to bundle into the archive. Set to
+            ``None`` to use the dependencies installed for ``python`` instead, in which
+            case the archive will not be self-contained.
+        python:
+            Interpreter used to run the archive.
+        compressed:
+            Compress the archive. This reduces the size of the archive at the cost of
+            decompressing each module when it is imported.
+
+    Returns:
+        Path to the archive.
+    """
+    output = Path(output).resolve()
+    with tempfile.TemporaryDirectory() as tmp:
+        staging = Path(tmp) / "app"
+
+        logger.info(f"Copying '{_PACKAGE_DIR}' into archive")
+        shutil.copytree(
+            _PACKAGE_DIR,
+            staging / "reload",
+            ignore=shutil.ignore_patterns("__pycache__", "*.py[cod]")
+        )
+
+        if requirements:
+            logger.info(f"Installing dependencies from '{requirements}' into archive")
+            subprocess.run(
+                [
+                    sys.executable, "-m", "pip", "install", "--quiet",
+                    "--no-compile", "--target", str(staging), "-r", str(requirements)
+                ],
+                check=True
+            )
+            shutil.rmtree(staging / "bin", ignore_errors=True)
+
+        (staging / "__main__.py").write_text(_BOOTSTRAP)
+
+        # Compile every module next to its source because zipimport does not look in
+        # __pycache__. Unchecked hash based bytecode is never validated against the
+        # source so the import does not need to stat or read it.
+        logger.info("Compiling bytecode for every module")
+        ok = compileall.compile_dir(
+            str(staging),
+            quiet=1,
+            legacy=True,
+            stripdir=str(staging),
+            prependdir="",
+            invalidation_mode=py_compile.PycInvalidationMode.UNCHECKED_HASH
+        )
+        if not ok:
+            raise RuntimeError("Failed to compile bytecode for the archive")
+
+        # -I keeps the current working directory, user site-packages and PYTHON*
+        # environment variables off the import path. -S also removes site-packages when
+        # the dependencies are bundled, leaving only the archive and standard library.
+        flags = "-IS" if requirements else "-I"
+        interpreter = f"{python} {flags}"
+
+        tmp_archive = Path(tmp) / output.name
+        zipapp.create_archive(
+            staging,
+            target=tmp_archive,
+            interpreter=interpreter,
+            compressed=compressed
+        )
+        _replace(tmp_archive, output)
+
+    logger.info(f"Built archive '{output}'")
+    return output
+
+
+def _replace(src: Path, dst: Path) -> None:
+    # Copy next to the destination so the final rename is on the same file system and
+    # therefore atomic.
+    fd, tmp = tempfile.mkstemp(prefix=f".{dst.name}.", dir=dst.parent)
+    try:
+        with os.fdopen(fd, "wb") as f, open(src, "rb") as s:
+            shutil.copyfileobj(s, f)
+        mode = dst.stat().st_mode if dst.exists() else src.stat().st_mode
+        os.chmod(tmp, mode | 0o111)
+        os.replace(tmp, dst)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
+
+def running_archive() -> Optional[Path]:
+    """Get the archive reload is running from or ``None`` if it is not a zipapp."""
+    archive = _PACKAGE_DIR.parent
+    return archive if zipfile.is_zipfile(archive) else None
+
+
+def self_update(
+    source: str,
+    target: Optional[Union[str, PurePath]] = None,
+    timeout: float = 60
+) -> Path:
+    """Atomically replace an archive with a new one.
+
+    The new archive is downloaded or copied next to the target, verified, then renamed
+    over the target so the target is never left partially written.
+
+    .. note::
+        zipimport reads modules from the archive path lazily, so this should be the last
+        thing done by a process running from ``target``.
+
+    Args:
+        source:
+            Path or ``http(s)://`` URL of the new archive.
+        target:
+            Archive to replace. Defaults to the archive reload is running from.
+        timeout:
+            Seconds to wait on the connection when downloading the new archive.
+
+    Returns:
+        Path to the updated archive.
+    """
+    if target is None:
+        target = running_archive()
+        if target is None:
+            raise RuntimeError(
+                "Reload is not running from a zipapp archive, --self-update only works"
+                " when running the archive built with 'python -m reload.bundle build'."
+            )
+    target = Path(target).resolve()
+
+    with tempfile.TemporaryDirectory(dir=target.parent) as tmp:
+        new = Path(tmp) / target.name
+        if source.startswith(("http://", "https://")):
+            logger.info(f"Downloading new archive from '{source}'")
+            with urllib.request.urlopen(source, timeout=timeout) as resp, open(new, "wb") as f:
+                shutil.copyfileobj(resp, f)
+        else:
+            logger.info(f"Copying new archive from '{source}'")
+            shutil.copyfile(source, new)
+
+        if not zipfile.is_zipfile(new):
+            raise ValueError(f"New archive '{source}' is not a zipapp archive")
+        with zipfile.ZipFile(new) as zf:
+            missing = [m for m in _REQUIRED_MEMBERS if m not in zf.namelist()]
+            if missing:
+                raise ValueError(f"New archive '{source}' is missing {missing}")
+            bad = zf.testzip()
+            if bad:
+                raise ValueError(f"New archive '{source}' is corrupt at '{bad}'")
+
+        _replace(new, target)
+
+    logger.info(f"Updated archive '{target}' from '{source}'")
+    return target
+
+
+def bench(
+    archive: Union[str, PurePath] = DEFAULT_ARCHIVE,
+    runs: int = 10
+) -> Dict[str, List[float]]:
+    """Measure start time of the archive against ``python -m reload``.
+
+    Each entry point is run with ``--help`` which imports every module before exiting.
+    ``python -m reload`` is measured warm, with every ``__pycache__`` already written,
+    which is the main comparison. It is also measured cold, with only the reload
+    package's ``__pycache__`` removed before each run, which is what a run after
+    updating the sources looks like since pip precompiles the dependencies. Each entry
+    point is run once before it is measured so the files are in the OS file cache.
+
+    Args:
+        archive:
+            Archive to measure.
+        runs:
+            Number of times to run each entry point.
+
+    Returns:
+        Run times in seconds for each entry point.
+    """
+    def clear_pycache():
+        shutil.rmtree(_PACKAGE_DIR / "__pycache__", ignore_errors=True)
+
+    source = [sys.executable, "-m", "reload", "--help"]
+    commands = {
+        "python -m reload (warm)": (source, None),
+        "python -m reload (cold)": (source, clear_pycache),
+        str(archive): ([str(Path(archive).resolve()), "--help"], None),
+    }
+    times: Dict[str, List[float]] = {}
+    for name, (cmd, setup) in commands.items():
+        times[name] = []
+        for i in range(runs + 1):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            subprocess.run(
+                cmd,
+                cwd=_PACKAGE_DIR.parent,
+                stdout=subprocess.DEVNULL,
+                check=True
+            )
+            if i > 0:
+                times[name].append(time.perf_counter() - start)
+
+        logger.info(
+            f"'{name}' startup: min {min(times[name])*1e3:.1f} ms, median"
+            f" {statistics.median(times[name])*1e3:.1f} ms over {runs} runs"
+        )
+
+    return times
+
+
+def cli() -> object:
+    """Create the command line interface."""
+
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build the zipapp archive.")
+    build_parser.add_argument(
+        "-o",
+        "--output",
+        dest="output",
+        type=str,
+        default=str(DEFAULT_ARCHIVE),
+        help="Archive to create. Defaults to ``<CWD>/reload.pyz``"
+    )
+    build_parser.add_argument(
+        "--no-deps",
+        dest="deps",
+        action="store_false",
+        default=True,
+        help=(
+            "Do not bundle dependencies, the archive will use the dependencies installed"
+            " for the interpreter instead."
+        )
+    )
+    build_parser.add_argument(
+        "--compress",
+        dest="compressed",
+        action="store_true",
+        default=False,
+        help="Compress the archive."
+    )
+
+    bench_parser = subparsers.add_parser(
+        "bench", help="Measure archive startup time against ``python -m reload``."
+    )
+    bench_parser.add_argument(
+        "archive",
+        type=str,
+        nargs="?",
+        default=str(DEFAULT_ARCHIVE),
+        help="Archive to measure. Defaults to ``<CWD>/reload.pyz``"
+    )
+    bench_parser.add_argument(
+        "-n",
+        "--runs",
+        dest="runs",
+        type=int,
+        default=10,
+        help="Number of times to run each entry point."
+    )
+
+    return parser
+
+
+if __name__ == "__main__":
+    args = cli().parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "build":
+        build(
+            args.output,
+            requirements=DEFAULT_REQUIREMENTS if args.deps else None,
+            compressed=args.compressed
+        )
+    elif args.command == "bench":
+        bench(args.archive, runs=args.runs)
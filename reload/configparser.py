@@ -54,8 +54,8 @@ class ReloadConfig:
     to purchasing.
 
     .. note::
-        When this is enabled, the time between purchases will be random between 1 and
-        5 seconds.
+        When this is enabled, the time between purchases is adapted to how Amazon
+        responds. Reference :class:`~reload.pacing.Pacer`.
     """
 
     days: Optional[Tuple[int, int]] = (1, 28)
@@ -88,6 +88,17 @@ class ReloadConfig:
         return random.randint(1, self.purchases-num_complete)
 
 
+@dataclass
+class WebDriverConfig:
+    """Dataclass for representing the remote WebDriver pool parameters."""
+
+    endpoints: List[str]
+    """WebDriver endpoint URLs like ``http://node1:4444``."""
+
+    max_sessions: int = 1
+    """Maximum number of sessions to run on each endpoint at the same time."""
+
+
 # TODO: Add schema validator using jsonschema
 def parse_config(file: Union[str, PurePath]) -> Sequence[ReloadConfig]:
     """Parse YAML configuration file for card and reload information.
@@ -128,3 +139,49 @@ def parse_config(file: Union[str, PurePath]) -> Sequence[ReloadConfig]:
         configs.append(cfg)
 
     return configs
+
+
+def parse_webdriver_config(file: Union[str, PurePath]) -> Optional[WebDriverConfig]:
+    """Parse YAML configuration file for remote WebDriver information.
+
+    Args:
+        file:
+            File to parse for remote WebDriver information.
+
+    Returns:
+        The remote WebDriver configuration or ``None`` if the ``webdriver`` section is
+        not present, in which case a local Chrome driver should be used.
+
+    Raises:
+        ValueError: If the ``webdriver`` section is invalid.
+    """
+    with open(file) as f:
+        data = yaml.safe_load(f)
+
+    if "webdriver" not in data:
+        return None
+
+    section = data["webdriver"]
+    if not isinstance(section, dict):
+        raise ValueError(
+            f"'webdriver' in '{file}' must be a mapping with 'endpoints', remove it to"
+            " use a local Chrome driver."
+        )
+
+    endpoints = section.get("endpoints")
+    if (
+        not isinstance(endpoints, list)
+        or not endpoints
+        or not all(isinstance(e, str) for e in endpoints)
+    ):
+        raise ValueError(
+            f"'webdriver.endpoints' in '{file}' must be a non-empty list of WebDriver"
+            " endpoint URLs."
+        )
+
+    max_sessions = section.get("max_sessions", 1)
+    if not isinstance(max_sessions, int) or max_sessions < 1:
+        raise ValueError(f"'webdriver.max_sessions' in '{file}' must be an int >= 1.")
+
+    logger.info(f"Found remote WebDriver endpoints {endpoints}.")
+    return WebDriverConfig(endpoints=endpoints, max_sessions=max_sessions)
@@ -0,0 +1,214 @@
+"""WebDriver factories.
+
+These classes are for creating and releasing the browser sessions used to interact with
+Amazon, either with a local Chrome driver or with a pool of remote WebDriver endpoints.
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.request
+
+from typing import Dict, List, Sequence
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.service import Service
+
+from webdriver_manager.chrome import ChromeDriverManager
+
+
+logger = logging.getLogger(__name__)
+
+
+class LocalDriverFactory:
+    """Create Chrome drivers on the local host."""
+
+    capacity: int = 1
+    """Number of sessions that can run at the same time."""
+
+
+    def create(self) -> webdriver.Remote:
+        """Create a local Chrome driver."""
+        logger.debug("Creating Chrome driver")
+        return webdriver.Chrome(
+            service=Service(ChromeDriverManager().install()),
+            options=webdriver.ChromeOptions()
+        )
+
+
+    def release(self, driver: webdriver.Remote) -> None:
+        """Release a driver created by :meth:`create`.
+
+        The local browser is intentionally left open.
+        """
+
+
+class RemoteDriverPool:
+    """Create Chrome sessions on a pool of remote WebDriver endpoints.
+
+    Sessions are placed on the healthy endpoint with the fewest sessions created by this
+    pool. If an endpoint fails its health check or fails to create a session, it is
+    left out of the pool for ``cooldown`` seconds and the next least loaded endpoint is
+    tried. When every healthy endpoint is full, :meth:`create` waits for a session to be
+    released.
+
+    Args:
+        endpoints:
+            WebDriver endpoint URLs like ``http://node1:4444``.
+        max_sessions:
+            Maximum number of sessions to run on each endpoint at the same time.
+        timeout:
+            Seconds to wait for an endpoint health check.
+        cooldown:
+            Seconds to leave an unhealthy endpoint out of the pool before checking it
+            again.
+    """
+
+
+    def __init__(
+        self,
+        endpoints: Sequence[str],
+        max_sessions: int = 1,
+        timeout: float = 5,
+        cooldown: float = 60
+    ) -> None:
+        if not endpoints:
+            raise ValueError("'endpoints' must contain at least one WebDriver endpoint")
+        if max_sessions < 1:
+            raise ValueError("'max_sessions' must be >= 1")
+        if cooldown <= 0:
+            raise ValueError("'cooldown' must be > 0")
+
+        self.endpoints: List[str] = [e.rstrip("/") for e in endpoints]
+        self.max_sessions = max_sessions
+        self.timeout = timeout
+        self.cooldown = cooldown
+
+        self._cond = threading.Condition()
+        self._load: Dict[str, int] = {e: 0 for e in self.endpoints}
+        self._unhealthy_until: Dict[str, float] = {}
+        self._sessions: Dict[str, str] = {}
+
+
+    def _available(self) -> List[str]:
+        # Endpoints that are not cooling down after failing, must hold the lock.
+        now = time.monotonic()
+        return [e for e in self.endpoints if self._unhealthy_until.get(e, 0) <= now]
+
+
+    @property
+    def capacity(self) -> int:
+        """Number of sessions that can run at the same time on healthy endpoints."""
+        with self._cond:
+            return len(self._available()) * self.max_sessions
+
+
+    def healthy(self, endpoint: str) -> bool:
+        """Check if an endpoint is ready to accept new sessions.
+
+        This queries the WebDriver ``/status`` endpoint which is supported by standalone
+        drivers and Selenium Grid.
+        """
+        url = f"{endpoint}/status"
+        try:
+            with urllib.request.urlopen(url, timeout=self.timeout) as resp:
+                status = json.load(resp)
+        except (OSError, ValueError) as e:
+            logger.warning(f"WebDriver endpoint '{endpoint}' health check failed: {e}")
+            return False
+
+        ready = bool(status.get("value", {}).get("ready", False))
+        if not ready:
+            logger.warning(f"WebDriver endpoint '{endpoint}' is not ready")
+        return ready
+
+
+    def _reserve(self) -> str:
+        # Reserve a session on the least loaded healthy endpoint that has room,
+        # preferring endpoints in the order they were given. Waits for a session to be
+        # released or an endpoint to recover if every healthy endpoint is full.
+        with self._cond:
+            while True:
+                available = self._available()
+                if not available:
+                    raise RuntimeError(
+                        "Unable to create a WebDriver session, no healthy endpoints in"
+                        f" {self.endpoints}."
+                    )
+
+                candidates = [e for e in available if self._load[e] < self.max_sessions]
+                if candidates:
+                    endpoint = min(candidates, key=lambda e: self._load[e])
+                    self._load[endpoint] += 1
+                    return endpoint
+
+                # Wake up when the next unhealthy endpoint can be checked again in case
+                # nothing is released before then.
+                now = time.monotonic()
+                recover = [t - now for t in self._unhealthy_until.values() if t > now]
+                self._cond.wait(timeout=min(recover) if recover else None)
+
+
+    def _unreserve(self, endpoint: str, healthy: bool = True) -> None:
+        with self._cond:
+            self._load[endpoint] = max(0, self._load[endpoint] - 1)
+            if not healthy:
+                logger.warning(
+                    f"Leaving WebDriver endpoint '{endpoint}' out of the pool for"
+                    f" {self.cooldown} seconds"
+                )
+                self._unhealthy_until[endpoint] = time.monotonic() + self.cooldown
+            self._cond.notify_all()
+
+
+    def _connect(self, endpoint: str) -> webdriver.Remote:
+        return webdriver.Remote(
+            command_executor=endpoint,
+            options=webdriver.ChromeOptions()
+        )
+
+
+    def create(self) -> webdriver.Remote:
+        """Create a Chrome session on the least loaded healthy endpoint.
+
+        Raises:
+            RuntimeError: If there are no healthy endpoints.
+        """
+        while True:
+            endpoint = self._reserve()
+
+            if not self.healthy(endpoint):
+                self._unreserve(endpoint, healthy=False)
+                continue
+
+            logger.debug(f"Creating Chrome session on '{endpoint}'")
+            # Any error here, including urllib3 connection errors when the node went
+            # down after its health check, means the endpoint can't take the session.
+            try:
+                driver = self._connect(endpoint)
+            except Exception as e:
+                logger.warning(
+                    f"Failed to create session on '{endpoint}', failing over: {e}"
+                )
+                self._unreserve(endpoint, healthy=False)
+                continue
+
+            with self._cond:
+                self._sessions[driver.session_id] = endpoint
+            return driver
+
+
+    def release(self, driver: webdriver.Remote) -> None:
+        """Quit a session created by :meth:`create` and free its slot."""
+        with self._cond:
+            endpoint = self._sessions.pop(driver.session_id, None)
+
+        try:
+            driver.quit()
+        except WebDriverException as e:
+            logger.warning(f"Failed to quit session on '{endpoint}': {e.msg}")
+        finally:
+            if endpoint:
+                self._unreserve(endpoint)
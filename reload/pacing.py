@@ -0,0 +1,105 @@
+"""Adaptive pacing for Amazon page interactions.
+
+These classes are for classifying what Amazon responded with after an interaction and
+adjusting the delay between interactions for a specific account based on that response.
+"""
+
+import logging
+import random
+import time
+
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class Outcome(Enum):
+    """Classification of the page Amazon responded with."""
+
+    SUCCESS = "success"
+    """Page loaded normally without any challenge."""
+
+    CAPTCHA = "captcha"
+    """Amazon is asking to solve a CAPTCHA."""
+
+    THROTTLE = "throttle"
+    """Amazon rejected or rate limited the request."""
+
+    CHALLENGE = "challenge"
+    """Amazon is asking for additional sign-in verification."""
+
+    UNCONFIRMED = "unconfirmed"
+    """Order was submitted but the order confirmation was not found."""
+
+
+@dataclass
+class Pacer:
+    """Per-account rate controller.
+
+    The delay between interactions is decreased after each successful interaction and
+    increased exponentially after each throttle, CAPTCHA, sign-in challenge or
+    unconfirmed order. This is saved with the account state so the learned delay
+    carries over between runs.
+    """
+
+    delay: float = 3.0
+    """Current delay in seconds between interactions."""
+
+    min_delay: float = 1.0
+    """Lower bound for :data:`~reload.pacing.Pacer.delay`."""
+
+    max_delay: float = 600.0
+    """Upper bound for :data:`~reload.pacing.Pacer.delay`."""
+
+    speedup: float = 0.9
+    """Factor applied to the delay after a successful interaction."""
+
+    backoff: float = 2.0
+    """Factor applied to the delay after any outcome other than success."""
+
+    jitter: float = 0.5
+    """Fraction of the delay to randomize the wait by in either direction."""
+
+    failures: int = 0
+    """Number of consecutive challenged interactions."""
+
+    last_outcome: Optional[Outcome] = None
+    """Outcome of the most recent interaction."""
+
+
+    def record(self, outcome: Outcome) -> float:
+        """Update the delay based on the outcome of an interaction.
+
+        Args:
+            outcome:
+                Classification of the page after the interaction.
+
+        Returns:
+            The new delay in seconds.
+        """
+        self.last_outcome = outcome
+        if outcome is Outcome.SUCCESS:
+            self.failures = 0
+            self.delay = max(self.min_delay, self.delay * self.speedup)
+        else:
+            self.failures += 1
+            self.delay = min(self.max_delay, self.delay * self.backoff)
+            logger.warning(
+                f"Amazon responded with {outcome.value} ({self.failures} in a row),"
+                f" backing off to {self.delay:.1f} seconds between interactions."
+            )
+
+        logger.debug(f"Delay between interactions set to {self.delay:.1f} seconds")
+        return self.delay
+
+
+    def wait(self) -> None:
+        """Sleep for the current delay with some randomness added."""
+        seconds = random.uniform(
+            self.delay * (1 - self.jitter), self.delay * (1 + self.jitter)
+        )
+        logger.debug(f"Waiting {seconds:.1f} seconds before next interaction")
+        time.sleep(seconds)
@@ -1,5 +1,6 @@
 """Package utilities."""
 
+import dbm
 import logging
 import pickle
 import shelve
@@ -129,7 +130,9 @@ def flatten(nested_list: list) -> list:
 
 def load_state(state_name: str, state_file: Union[str, PurePath]) -> Optional[object]:
     logger.debug(f"Fetching state of '{state_name}' from '{state_file}' database.")
-    if not Path(state_file).exists():
+    # The database may be saved with a suffix depending on the dbm backend, so check for
+    # the database instead of the exact file name.
+    if not dbm.whichdb(str(state_file)):
         logger.debug(f"State file does not exist yet '{state_file}'")
         return None
 
@@ -0,0 +1,25 @@
+"""Tests for :mod:`reload.amazon` gift card activity matching."""
+
+from datetime import datetime
+
+from reload.amazon import find_order_id, find_reloads
+
+_DATE = datetime(2026, 10, 19, 8, 0)
+
+
+def test_find_order_id():
+    assert find_order_id("Order D01-1234567-7654321 placed") == "D01-1234567-7654321"
+    assert find_order_id("Gift Card reload") is None
+
+
+def test_find_reloads_matches_amount_and_date_formats():
+    lines = [
+        "October 19, 2026 Gift Card reload $0.50",
+        "Oct 20, 2026 Gift Card reload $0.50",
+        "10/19/2026 Gift Card reload $0.50",
+        "October 19, 2026 Gift Card reload $0.51",
+        "October 21, 2026 Gift Card reload $0.50",
+        "October 18, 2026 Gift Card reload $0.50",
+    ]
+
+    assert find_reloads(lines, 0.5, _DATE) == lines[:3]
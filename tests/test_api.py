@@ -0,0 +1,196 @@
+"""Tests for :mod:`reload.api`."""
+
+import threading
+import time
+
+from datetime import datetime
+
+import pytest
+
+from reload.api import PurchaseInfo, Reload
+from reload.pacing import Outcome, Pacer
+
+_CONFIG = """\
+version: 0.1
+
+cards:
+  - name: first
+    credentials: "user@example.com:pass"
+    card: "1111"
+    purchases: 2
+    amount_limits: [.5, .5]
+
+  - name: second
+    credentials: "user@example.com:pass"
+    card: "2222"
+    purchases: 2
+    amount_limits: [.5, .5]
+
+  - name: other
+    credentials: "other@example.com:pass"
+    card: "3333"
+    purchases: 2
+    amount_limits: [.5, .5]
+"""
+
+
+@pytest.fixture
+def config_file(tmp_path):
+    path = tmp_path / "reloads.yaml"
+    path.write_text(_CONFIG)
+    return path
+
+
+@pytest.fixture
+def reload(config_file, tmp_path):
+    return Reload(config_file, state_file=tmp_path / "state.db")
+
+
+def test_pacer_shared_per_login(reload):
+    first, second, other = (reload.get_state(c) for c in reload._configs)
+
+    assert first.pacer is second.pacer
+    assert first.pacer is not other.pacer
+
+
+def test_pacer_saved_per_login(reload, config_file, tmp_path):
+    first, second, _ = (reload.get_state(c) for c in reload._configs)
+    first.pacer.record(Outcome.CAPTCHA)
+    reload.save(first)
+
+    reloaded = Reload(config_file, state_file=tmp_path / "state.db")
+    second = reloaded.get_state(reloaded._configs[1])
+
+    assert second.pacer.last_outcome is Outcome.CAPTCHA
+    assert second.pacer.delay == first.pacer.delay
+
+
+_DAY = datetime(2026, 10, 19, 8, 0)
+
+
+class FakeAmazon:
+    """Stand in for :class:`reload.amazon.Amazon` with a fixed gift card activity."""
+
+    activity = []
+    reloads = []
+
+
+    def __init__(self, username, password, card, pacer, drivers) -> None:
+        self.pacer = pacer
+        self.signed_in = True
+
+
+    def reload_activity(self):
+        return list(self.activity)
+
+
+    def reload_balance(self, amount, confirm_timeout):
+        self.reloads.append(amount)
+        self.pacer.record(Outcome.SUCCESS)
+        return True, "111-0000000-0000001"
+
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.fixture
+def fake_amazon(monkeypatch):
+    FakeAmazon.activity = []
+    FakeAmazon.reloads = []
+    monkeypatch.setattr("reload.api.Amazon", FakeAmazon)
+    monkeypatch.setattr("reload.api.datetime", FixedDatetime)
+    return FakeAmazon
+
+
+class FixedDatetime(datetime):
+    @classmethod
+    def now(cls):
+        return _DAY.replace(hour=12)
+
+
+def burst_state(reload, purchases):
+    # Fixed amount burst with one confirmed and one unconfirmed purchase on one day
+    state = reload.get_state(reload._configs[0])
+    state.pacer = Pacer(delay=0, min_delay=0, jitter=0)
+    state.purchases = purchases
+    state.num_complete = sum(p.purchased for p in purchases)
+    return state
+
+
+def test_reconcile_does_not_match_confirmed_sibling(reload, fake_amazon):
+    confirmed = PurchaseInfo(_DAY, 0.5, 1, purchased=True)
+    unconfirmed = PurchaseInfo(_DAY, 0.5, 1, purchased=False)
+    state = burst_state(reload, [confirmed, unconfirmed])
+    fake_amazon.activity = ["October 19, 2026 Gift Card reload $0.50"]
+
+    state = reload.run_reconcile(state)
+
+    assert fake_amazon.reloads == [0.5]
+    assert unconfirmed.purchased
+    assert unconfirmed.order_id == "111-0000000-0000001"
+    assert state.num_complete == 2
+
+
+def test_reconcile_matches_leftover_activity(reload, fake_amazon):
+    confirmed = PurchaseInfo(_DAY, 0.5, 1, purchased=True)
+    unconfirmed = PurchaseInfo(_DAY, 0.5, 1, purchased=False)
+    state = burst_state(reload, [confirmed, unconfirmed])
+    fake_amazon.activity = ["October 19, 2026 Gift Card reload $0.50"] * 2
+
+    state = reload.run_reconcile(state)
+
+    assert fake_amazon.reloads == []
+    assert unconfirmed.purchased
+    assert state.num_complete == 2
+
+
+def test_reconcile_matches_by_order_id(reload, fake_amazon):
+    confirmed = PurchaseInfo(
+        _DAY, 0.5, 1, purchased=True, order_id="D01-1111111-1111111"
+    )
+    unconfirmed = PurchaseInfo(_DAY, 0.5, 1, purchased=False)
+    state = burst_state(reload, [confirmed, unconfirmed])
+
+    # Only the confirmed order is in the activity, so the unconfirmed one is re-run
+    fake_amazon.activity = ["October 19, 2026 D01-1111111-1111111 $0.50"]
+    state = reload.run_reconcile(state)
+    assert fake_amazon.reloads == [0.5]
+
+    # An order ID that isn't accounted for is matched without re-running
+    unconfirmed.purchased = False
+    state.num_complete = 1
+    fake_amazon.reloads.clear()
+    fake_amazon.activity.append("October 19, 2026 D01-2222222-2222222 $0.50")
+    state = reload.run_reconcile(state)
+    assert fake_amazon.reloads == []
+    assert unconfirmed.order_id == "D01-2222222-2222222"
+
+
+def test_run_groups_jobs_by_login(reload, monkeypatch):
+    running = {}
+    overlaps = []
+    lock = threading.Lock()
+
+    def run_purchases(state):
+        username = state.config.username
+        with lock:
+            running[username] = running.get(username, 0) + 1
+            overlaps.append(dict(running))
+        time.sleep(0.05)
+        with lock:
+            running[username] -= 1
+        return state
+
+    class Pool:
+        capacity = 3
+
+    reload._drivers = Pool()
+    monkeypatch.setattr(reload, "run_purchases", run_purchases)
+
+    reload.run(force=True)
+
+    # The two configs for one login never run at the same time, but other logins do
+    assert len(overlaps) == 3
+    assert all(n <= 1 for o in overlaps for n in o.values())
+    assert any(sum(o.values()) == 2 for o in overlaps)
@@ -0,0 +1,43 @@
+"""Tests for :mod:`reload.configparser`."""
+
+import pytest
+
+from reload.configparser import parse_webdriver_config
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    def write(text):
+        path = tmp_path / "reloads.yaml"
+        path.write_text("version: 0.1\ncards: []\n" + text)
+        return path
+    return write
+
+
+def test_no_webdriver_section(write_config):
+    assert parse_webdriver_config(write_config("")) is None
+
+
+def test_webdriver_section(write_config):
+    cfg = parse_webdriver_config(write_config(
+        "webdriver:\n  endpoints: ['http://a:4444', 'http://b:4444']\n"
+        "  max_sessions: 2\n"
+    ))
+
+    assert cfg.endpoints == ["http://a:4444", "http://b:4444"]
+    assert cfg.max_sessions == 2
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "webdriver:\n#  endpoints: ['http://a:4444']\n",
+        "webdriver:\n  endpoints: 'http://a:4444'\n",
+        "webdriver:\n  endpoints: []\n",
+        "webdriver:\n  max_sessions: 1\n",
+        "webdriver:\n  endpoints: ['http://a:4444']\n  max_sessions: 0\n",
+    ]
+)
+def test_invalid_webdriver_section(write_config, text):
+    with pytest.raises(ValueError, match="webdriver"):
+        parse_webdriver_config(write_config(text))
@@ -0,0 +1,136 @@
+"""Tests for :mod:`reload.drivers`."""
+
+import itertools
+import threading
+import time
+
+import pytest
+
+from selenium.common.exceptions import WebDriverException
+
+from reload.drivers import RemoteDriverPool
+
+
+class FakeDriver:
+    """Stand in for a remote WebDriver session."""
+
+    _ids = itertools.count()
+
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        self.session_id = str(next(self._ids))
+        self.quit_called = False
+
+
+    def quit(self) -> None:
+        self.quit_called = True
+
+
+class FakePool(RemoteDriverPool):
+    """Pool with stubbed health checks and session creation."""
+
+
+    def __init__(self, *args, unhealthy=(), refuse=(), down=(), **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.unhealthy = set(unhealthy)
+        self.refuse = set(refuse)
+        self.down = set(down)
+        self.checked = []
+
+
+    def healthy(self, endpoint: str) -> bool:
+        self.checked.append(endpoint)
+        return endpoint not in self.unhealthy
+
+
+    def _connect(self, endpoint: str) -> FakeDriver:
+        if endpoint in self.refuse:
+            raise WebDriverException("session not created")
+        if endpoint in self.down:
+            raise ConnectionRefusedError(111, "Connection refused")
+        return FakeDriver(endpoint)
+
+
+def test_least_loaded_endpoint():
+    pool = FakePool(["http://a", "http://b"], max_sessions=2)
+
+    drivers = [pool.create() for _ in range(4)]
+
+    assert [d.endpoint for d in drivers] == ["http://a", "http://b"] * 2
+
+
+def test_unhealthy_endpoint_is_skipped():
+    pool = FakePool(["http://a", "http://b"], unhealthy=["http://a"])
+
+    driver = pool.create()
+
+    assert driver.endpoint == "http://b"
+    assert pool.capacity == 1
+
+
+def test_failed_session_fails_over():
+    pool = FakePool(["http://a", "http://b"], refuse=["http://a"])
+
+    assert pool.create().endpoint == "http://b"
+    assert pool.capacity == 1
+
+
+def test_connection_error_fails_over():
+    # The node passed its health check but went down before the session was created
+    pool = FakePool(["http://a", "http://b"], down=["http://a"])
+
+    assert pool.create().endpoint == "http://b"
+    assert pool._load == {"http://a": 0, "http://b": 1}
+    assert pool.capacity == 1
+
+
+def test_no_healthy_endpoints_raises():
+    pool = FakePool(["http://a", "http://b"], unhealthy=["http://a", "http://b"])
+
+    with pytest.raises(RuntimeError, match="no healthy endpoints"):
+        pool.create()
+
+
+def test_unhealthy_endpoint_recovers_after_cooldown():
+    pool = FakePool(["http://a"], unhealthy=["http://a"], cooldown=0.05)
+
+    with pytest.raises(RuntimeError):
+        pool.create()
+
+    pool.unhealthy.clear()
+    time.sleep(0.1)
+    assert pool.create().endpoint == "http://a"
+
+
+def test_release_frees_slot():
+    pool = FakePool(["http://a", "http://b"])
+    first = pool.create()
+    pool.create()
+
+    pool.release(first)
+
+    assert first.quit_called
+    assert pool.create().endpoint == first.endpoint
+
+
+def test_waits_for_slot_when_endpoint_is_down():
+    # One worker per slot is started, so the worker placed on the unhealthy endpoint
+    # has to wait for the session on the healthy endpoint to be released.
+    pool = FakePool(["http://a", "http://b"], unhealthy=["http://b"])
+    first = pool.create()
+    result = {}
+
+    def worker():
+        result["driver"] = pool.create()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join(timeout=0.2)
+    assert thread.is_alive()
+
+    pool.release(first)
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert result["driver"].endpoint == "http://a"
@@ -0,0 +1,98 @@
+"""Tests for :mod:`reload.pacing` and page classification."""
+
+import pytest
+
+from reload.amazon import Amazon
+from reload.pacing import Outcome, Pacer
+
+
+class FakeDriver:
+    """Stand in for a WebDriver showing a page with ``title`` and element ``ids``."""
+
+
+    def __init__(self, title: str = "Amazon.com", ids=()) -> None:
+        self.title = title
+        self.ids = set(ids)
+
+
+    def find_elements(self, by, id):
+        return [id] if id in self.ids else []
+
+
+def make_amazon(driver: FakeDriver) -> Amazon:
+    # Skip __init__ so no driver is created and nothing is signed in to
+    amzn = Amazon.__new__(Amazon)
+    amzn._DRIVER = driver
+    return amzn
+
+
+def test_success_speeds_up_to_min_delay():
+    pacer = Pacer(delay=2.0, min_delay=1.0, speedup=0.5)
+
+    assert pacer.record(Outcome.SUCCESS) == 1.0
+    assert pacer.record(Outcome.SUCCESS) == 1.0
+
+
+@pytest.mark.parametrize(
+    "outcome",
+    [Outcome.CAPTCHA, Outcome.THROTTLE, Outcome.CHALLENGE, Outcome.UNCONFIRMED]
+)
+def test_failure_backs_off_to_max_delay(outcome):
+    pacer = Pacer(delay=2.0, max_delay=10.0, backoff=2.0)
+
+    assert pacer.record(outcome) == 4.0
+    assert pacer.record(outcome) == 8.0
+    assert pacer.record(outcome) == 10.0
+    assert pacer.failures == 3
+    assert pacer.last_outcome is outcome
+
+
+def test_success_resets_failures():
+    pacer = Pacer()
+    pacer.record(Outcome.THROTTLE)
+    pacer.record(Outcome.CAPTCHA)
+
+    pacer.record(Outcome.SUCCESS)
+
+    assert pacer.failures == 0
+    assert pacer.last_outcome is Outcome.SUCCESS
+
+
+def test_wait_is_within_jitter(monkeypatch):
+    slept = []
+    monkeypatch.setattr("reload.pacing.time.sleep", slept.append)
+    pacer = Pacer(delay=4.0, jitter=0.5)
+
+    for _ in range(20):
+        pacer.wait()
+
+    assert all(2.0 <= s <= 6.0 for s in slept)
+
+
+@pytest.mark.parametrize(
+    "driver, outcome",
+    [
+        (FakeDriver(), Outcome.SUCCESS),
+        (FakeDriver(title="Robot Check"), Outcome.CAPTCHA),
+        (FakeDriver(ids=["captchacharacters"]), Outcome.CAPTCHA),
+        (FakeDriver(ids=["auth-captcha-guess"]), Outcome.CAPTCHA),
+        (FakeDriver(title="Sorry! Something went wrong!"), Outcome.THROTTLE),
+        (FakeDriver(title="503 - Service Unavailable Error"), Outcome.THROTTLE),
+        (FakeDriver(title="Authentication required"), Outcome.CHALLENGE),
+        (FakeDriver(ids=["auth-mfa-otpcode"]), Outcome.CHALLENGE),
+    ]
+)
+def test_outcome(driver, outcome):
+    assert make_amazon(driver).outcome() is outcome
+
+
+def test_outcome_captcha_over_throttle_over_challenge():
+    captcha = FakeDriver(
+        title="Amazon Sign-In Service Unavailable", ids=["captchacharacters"]
+    )
+    throttle = FakeDriver(
+        title="Amazon Sign-In Service Unavailable", ids=["auth-mfa-otpcode"]
+    )
+
+    assert make_amazon(captcha).outcome() is Outcome.CAPTCHA
+    assert make_amazon(throttle).outcome() is Outcome.THROTTLE